@@ -2,19 +2,60 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from crewai import Agent
+from crewai import Agent, LLM
 from tools import search_tool, BloodTestReportTool
 
-# Loading LLM
+# Step-by-step agent output is for debugging only; enable with CREW_VERBOSE=true
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"
+
+# Shared HTTP connection pools so LLM calls reuse TCP/TLS connections
+import httpx
+import litellm
+_http_limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_http_client = httpx.Client(http2=True, limits=_http_limits, timeout=60)
+_http_async_client = httpx.AsyncClient(http2=True, limits=_http_limits, timeout=60)
+
+# CrewAI agents call the model through LiteLLM, which uses these sessions
+litellm.client_session = _http_client
+litellm.aclient_session = _http_async_client
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Document verification is simple validation and can run on a smaller model
+OPENAI_VERIFIER_MODEL = os.getenv("OPENAI_VERIFIER_MODEL", "gpt-4o-mini")
+
+# LLMs for the agents. CrewAI rebuilds any non-CrewAI model (e.g. ChatOpenAI)
+# from its name alone, dropping client, timeout and retry settings.
+def _build_agent_llm(model):
+    return LLM(
+        model=model,
+        temperature=0.3,
+        timeout=60,
+        max_retries=2
+    )
+
+agent_llm = _build_agent_llm(OPENAI_MODEL)
+verifier_agent_llm = _build_agent_llm(OPENAI_VERIFIER_MODEL)
+
+# LLM for direct calls outside the crew (fast path, streaming, map-reduce)
 from langchain_openai import ChatOpenAI
-llm = ChatOpenAI(model="gpt-4", temperature=0.3)
+llm = ChatOpenAI(
+    model=OPENAI_MODEL,
+    temperature=0.3,
+    request_timeout=60,
+    max_retries=2,
+    http_client=_http_client,
+    http_async_client=_http_async_client
+)
+
+# Agent prompts keep only static text so OpenAI prompt caching can reuse
+# the system prefix; per-request values live at the end of task descriptions.
 
 # Creating a Medical Analysis Agent
 medical_analyst = Agent(
     role="Medical Report Analyst",
-    goal="Analyze blood test reports and provide accurate, evidence-based medical insights for the query: {query}",
-    verbose=True,
-    memory=True,
+    goal="Analyze blood test reports and provide accurate, evidence-based medical insights for the user's query",
+    verbose=CREW_VERBOSE,
+    memory=False,
     backstory=(
         "You are a qualified medical professional with expertise in laboratory medicine and clinical pathology. "
         "You specialize in interpreting blood test results and identifying potential health concerns based on "
@@ -23,7 +64,7 @@ medical_analyst = Agent(
         "consulting with healthcare providers for proper medical guidance."
     ),
     tools=[BloodTestReportTool.read_data_tool],
-    llm=llm,
+    llm=agent_llm,
     max_iter=3,
     max_rpm=10,
     allow_delegation=False
@@ -33,14 +74,14 @@ medical_analyst = Agent(
 report_verifier = Agent(
     role="Medical Document Verifier",
     goal="Verify that uploaded documents are valid blood test reports and extract relevant medical information",
-    verbose=True,
-    memory=True,
+    verbose=CREW_VERBOSE,
+    memory=False,
     backstory=(
         "You are a medical records specialist with extensive experience in reviewing and validating "
         "laboratory reports. You can identify authentic blood test reports, extract key medical "
         "information, and flag any inconsistencies or missing data that might affect the analysis."
     ),
-    llm=llm,
+    llm=verifier_agent_llm,
     max_iter=2,
     max_rpm=10,
     allow_delegation=False
@@ -50,15 +91,15 @@ report_verifier = Agent(
 health_advisor = Agent(
     role="Health and Wellness Advisor",
     goal="Provide general health recommendations based on blood test analysis while emphasizing the need for professional medical consultation",
-    verbose=True,
-    memory=True,
+    verbose=CREW_VERBOSE,
+    memory=False,
     backstory=(
         "You are a certified health educator with knowledge of nutrition, lifestyle factors, and general wellness. "
         "You provide evidence-based general health recommendations while always emphasizing that specific "
         "medical advice should come from qualified healthcare providers. You focus on lifestyle modifications "
         "that may support overall health and wellness."
     ),
-    llm=llm,
+    llm=agent_llm,
     max_iter=2,
     max_rpm=10,
     allow_delegation=False
@@ -1,18 +1,44 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 import os
 import uuid
 import logging
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
 
+from cachetools import LRUCache
+from langchain_core.messages import HumanMessage, SystemMessage
 from crewai import Crew, Process
-from agents import medical_analyst, report_verifier, health_advisor
-from tasks import analyze_blood_report, verify_document, provide_health_guidance
+from agents import CREW_VERBOSE, llm, medical_analyst, report_verifier, health_advisor
+# Task imported under another name: the /analyze endpoint below is called analyze_blood_report
+from tasks import analyze_blood_report as analyze_blood_report_task, verify_document, provide_health_guidance
+from tasks import ANALYSIS_INSTRUCTIONS, ANALYSIS_REQUEST, VERIFICATION_INSTRUCTIONS, GUIDANCE_INSTRUCTIONS, GUIDANCE_REQUEST
+from single_flight import single_flight
+from tools import CONTENT_HASH_BYTES, content_hasher, read_data_async, active_report, ParsedReport, ReportValidationTool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upload limits
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+
+# Completed analyses keyed by (content hash, normalized query), and the
+# single-flight locks guarding their computation
+_RESULT_CACHE = LRUCache(maxsize=256)
+_RESULT_LOCKS = {}
+
+# Try a single consolidated LLM call before falling back to the multi-agent crew
+FAST_PATH_ENABLED = os.getenv("ANALYSIS_FAST_PATH", "true").lower() == "true"
+
+# Reports with more pages than this are analyzed page by page, then combined
+MAP_REDUCE_PAGE_THRESHOLD = 8
+MAP_REDUCE_CONCURRENCY = 5
+
 app = FastAPI(
     title="Blood Test Report Analyzer API",
     description="AI-powered blood test report analysis and health recommendations",
@@ -28,51 +54,454 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def run_analysis_crew(query: str, file_path: str):
+# Single-task crews for each analysis phase, built once at startup
+MEDICAL_CREWS = {
+    "verification": Crew(
+        agents=[report_verifier],
+        tasks=[verify_document],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE
+    ),
+    "analysis": Crew(
+        agents=[medical_analyst],
+        tasks=[analyze_blood_report_task],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE
+    ),
+    "guidance": Crew(
+        agents=[health_advisor],
+        tasks=[provide_health_guidance],
+        process=Process.sequential,
+        verbose=CREW_VERBOSE
+    )
+}
+
+# Crews keep per-run state, so concurrent requests each check out their own copies
+MAX_CONCURRENT_CREWS = int(os.getenv("MAX_CONCURRENT_CREWS", "4"))
+_CREW_POOL = asyncio.Queue()
+for _ in range(MAX_CONCURRENT_CREWS):
+    _CREW_POOL.put_nowait({phase: crew.copy() for phase, crew in MEDICAL_CREWS.items()})
+
+# Single-call prompt combining all three agents; static so it stays prompt-cacheable
+FAST_PATH_SYSTEM_PROMPT = "\n\n".join([
+    "You are a team of three specialists reviewing one blood test report.",
+    *(f"{agent.role}: {agent.backstory}" for agent in (report_verifier, medical_analyst, health_advisor)),
+    "Respond with a single JSON object with these keys:\n"
+    '- "verification": the Medical Document Verifier\'s assessment of whether this is a valid blood test report\n'
+    '- "analysis": the Medical Report Analyst\'s analysis of key findings, values outside normal ranges and the user\'s query\n'
+    '- "guidance": the Health and Wellness Advisor\'s general recommendations, including a clear medical disclaimer\n'
+    '- "confidence": "high" if the report is a readable blood test report you could fully analyze, otherwise "low"\n'
+    "Each section must be a markdown-formatted string."
+])
+
+# Sections of every analysis response, whichever path produced it
+ANALYSIS_SECTIONS = [
+    ("verification", "Document Verification"),
+    ("analysis", "Blood Test Analysis"),
+    ("guidance", "Health Guidance")
+]
+
+def format_analysis(sections: dict):
+    """Combine the verification, analysis and guidance outputs under their headings"""
+    return "\n\n".join(f"## {title}\n\n{sections[key].strip()}" for key, title in ANALYSIS_SECTIONS)
+
+async def run_fast_analysis(query: str, report: ParsedReport):
+    """
+    Analyze a report with one structured LLM call instead of three agent round trips
+    
+    Args:
+        query (str): User's specific question or request
+        report (ParsedReport): Extracted blood test report
+        
+    Returns:
+        str: Combined analysis, or None if the result is low-confidence or malformed
+    """
+    validation = ReportValidationTool.validate_medical_report(report)
+    if not validation.get("is_blood_test"):
+        logger.info("Skipping fast path: report does not look like a blood test")
+        return None
+    
+    messages = [
+        SystemMessage(content=FAST_PATH_SYSTEM_PROMPT),
+        HumanMessage(content=f"Blood test report:\n{report.text}\n\nUser query: {query}")
+    ]
+    response = await llm.bind(response_format={"type": "json_object"}).ainvoke(messages)
+    
+    try:
+        result = json.loads(response.content)
+    except json.JSONDecodeError:
+        logger.warning("Fast path returned invalid JSON")
+        return None
+    
+    if result.get("confidence") != "high":
+        logger.info("Fast path returned low confidence")
+        return None
+    
+    for key, _ in ANALYSIS_SECTIONS:
+        section = result.get(key)
+        if not isinstance(section, str) or not section.strip():
+            logger.warning("Fast path response is missing the %s section", key)
+            return None
+    
+    return format_analysis(result)
+
+async def run_analysis_crew(query: str, content_hash: str, report: ParsedReport, fast_path: bool = FAST_PATH_ENABLED):
     """
     Run the medical analysis crew to process blood test report
     
+    When fast_path is enabled, a single consolidated LLM call is tried first
+    and the crew only runs if it comes back low-confidence. In the crew,
+    verification and analysis only depend on the uploaded report, so they run
+    concurrently; the health guidance step fans in on both of their results.
+    Large reports skip the fast path: each page is condensed once, and
+    verification and analysis run directly over the condensed findings.
+    
     Args:
         query (str): User's specific question or request
-        file_path (str): Path to the uploaded blood test report
+        content_hash (str): Hash of the uploaded report contents
+        report (ParsedReport): Extracted report, kept reachable for the crew's tool calls
+        fast_path (bool): Try the single-call analysis before the crew
         
     Returns:
         dict: Analysis results from the crew
     """
     try:
-        logger.info(f"Starting analysis crew for query: {query}")
-        
-        # Create the medical analysis crew
-        medical_crew = Crew(
-            agents=[report_verifier, medical_analyst, health_advisor],
-            tasks=[verify_document, analyze_blood_report, provide_health_guidance],
-            process=Process.sequential,
-            verbose=True
-        )
+        pages = report.pages
+        is_large_report = len(pages) > MAP_REDUCE_PAGE_THRESHOLD
+        if fast_path and not is_large_report:
+            try:
+                fast_result = await run_fast_analysis(query, report)
+            except Exception as fast_error:
+                logger.warning("Fast path failed, falling back to crew: %s", fast_error)
+                fast_result = None
+            
+            if fast_result is not None:
+                logger.info("Fast path analysis completed successfully")
+                return {
+                    "status": "success",
+                    "analysis": fast_result,
+                    "crew_execution": "fast_path"
+                }
+        
+        logger.info("Starting analysis crew for query: %s", query)
         
-        # Execute the crew with the provided inputs
         inputs = {
             'query': query,
-            'file_path': file_path
+            'content_hash': content_hash
         }
         
-        result = medical_crew.kickoff(inputs)
+        findings = None
+        if is_large_report:
+            logger.info("Running map-reduce analysis over %s pages", len(pages))
+            findings = await condense_report(pages)
+        
+        crews = await _CREW_POOL.get()
+        try:
+            # Phase 1: independent verification and analysis
+            if findings is not None:
+                phase_runs = [
+                    run_direct_phase(VERIFICATION_PHASE, inputs, findings),
+                    run_direct_phase(ANALYSIS_PHASE, inputs, findings)
+                ]
+            else:
+                phase_runs = [
+                    crews["verification"].kickoff_async(inputs=dict(inputs)),
+                    crews["analysis"].kickoff_async(inputs=dict(inputs))
+                ]
+            
+            verification_result, analysis_result = await asyncio.gather(*phase_runs, return_exceptions=True)
+            
+            for phase_result in (verification_result, analysis_result):
+                if isinstance(phase_result, BaseException):
+                    raise phase_result
+            
+            # Phase 2: health guidance based on both results
+            result = await crews["guidance"].kickoff_async(inputs={
+                **inputs,
+                'verification_result': str(verification_result),
+                'analysis_result': str(analysis_result)
+            })
+        finally:
+            _CREW_POOL.put_nowait(crews)
         
         logger.info("Analysis crew completed successfully")
         return {
             "status": "success",
-            "analysis": str(result),
+            "analysis": format_analysis({
+                "verification": str(verification_result),
+                "analysis": str(analysis_result),
+                "guidance": str(result)
+            }),
             "crew_execution": "completed"
         }
         
     except Exception as e:
-        logger.error(f"Error in analysis crew: {str(e)}")
+        logger.error("Error in analysis crew: %s", e)
         return {
             "status": "error",
             "message": f"Analysis failed: {str(e)}",
             "crew_execution": "failed"
         }
 
+async def read_upload(file: UploadFile):
+    """
+    Validate an uploaded PDF and read it into memory in chunks
+    
+    Args:
+        file: Uploaded PDF file
+        
+    Returns:
+        tuple: Raw file contents and their content hash
+    """
+    # Validate file type
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(
+            status_code=400, 
+            detail="Only PDF files are supported. Please upload a PDF blood test report."
+        )
+    
+    # Read uploaded file into memory in chunks, enforcing the size limit
+    logger.info("Reading uploaded file: %s", file.filename)
+    content = bytearray()
+    hasher = content_hasher()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if len(content) + len(chunk) > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail="Uploaded file exceeds the 10MB size limit"
+            )
+        hasher.update(chunk)
+        content += chunk
+    
+    if len(content) == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    
+    return content, hasher.hexdigest(length=CONTENT_HASH_BYTES)
+
+def result_cache_key(content_hash: str, query: str):
+    """Key of a completed analysis in the result cache"""
+    return (content_hash, query.lower().strip())
+
+def clean_query(query: str):
+    """Apply the default query and length limit to a user query"""
+    if not query or query.strip() == "":
+        query = "Please analyze my blood test report and provide a comprehensive summary"
+    
+    return query.strip()[:1000]  # Limit query length
+
+async def extract_report(content_hash: str, content: bytes):
+    """
+    Extract the uploaded PDF in the worker pool so the agents' tool calls hit the cache
+    
+    Args:
+        content_hash (str): Hash of the uploaded report contents
+        content (bytes): Raw PDF contents of the uploaded report
+        
+    Returns:
+        ParsedReport: Extracted report
+    """
+    try:
+        report = await read_data_async(content_hash, data=content)
+    except BrokenProcessPool as pool_error:
+        logger.error("PDF worker crashed reading %s: %s", content_hash, pool_error)
+        raise HTTPException(status_code=500, detail="PDF processing failed unexpectedly, please try again")
+    except Exception as extract_error:
+        logger.error("Failed to read uploaded PDF %s: %s", content_hash, extract_error)
+        raise HTTPException(status_code=400, detail="Could not read the uploaded PDF file")
+    
+    if not report.pages:
+        raise HTTPException(
+            status_code=400,
+            detail="No readable text content found in the PDF file"
+        )
+    
+    return report
+
+async def get_or_run_analysis(query: str, content_hash: str, content: bytes):
+    """
+    Return the analysis for a report and query, running the crew only on a cache miss
+    
+    Concurrent requests for the same report and query wait on a shared lock,
+    so only one of them runs the crew and the rest read its cached result.
+    
+    Args:
+        query (str): Cleaned user query
+        content_hash (str): Hash of the uploaded report contents
+        content (bytes): Raw PDF contents of the uploaded report
+        
+    Returns:
+        str: Analysis text from the crew
+    """
+    cache_key = result_cache_key(content_hash, query)
+    async with single_flight(_RESULT_LOCKS, cache_key):
+        analysis = _RESULT_CACHE.get(cache_key)
+        if analysis is not None:
+            logger.info("Returning cached analysis for report: %s", content_hash)
+            return analysis
+        
+        report = await extract_report(content_hash, content)
+        
+        # Pin the report so the agents' tool calls can reach it until the crew is done
+        with active_report(content_hash, report) as active:
+            analysis_result = await run_analysis_crew(query=query, content_hash=content_hash, report=report)
+        
+        if analysis_result["status"] == "error":
+            raise HTTPException(status_code=500, detail=analysis_result["message"])
+        
+        if active.tool_failed:
+            logger.warning("Not caching analysis for report %s: a tool call failed", content_hash)
+        else:
+            _RESULT_CACHE[cache_key] = analysis_result["analysis"]
+        return analysis_result["analysis"]
+
+# Streaming phases: (name, section title, agent, task description, expected output).
+# Descriptions reuse the tasks' pieces without the tool line, as the report is inlined.
+STREAM_PHASES = [
+    ("verification", "Document Verification", report_verifier,
+     VERIFICATION_INSTRUCTIONS, verify_document.expected_output),
+    ("analysis", "Blood Test Analysis", medical_analyst,
+     ANALYSIS_INSTRUCTIONS + ANALYSIS_REQUEST, analyze_blood_report_task.expected_output),
+    ("guidance", "Health Guidance", health_advisor,
+     GUIDANCE_INSTRUCTIONS + GUIDANCE_REQUEST, provide_health_guidance.expected_output)
+]
+
+VERIFICATION_PHASE, ANALYSIS_PHASE, _ = STREAM_PHASES
+
+def phase_messages(agent, description: str, expected_output: str, inputs: dict, report_text: Optional[str]):
+    """Build the prompt for running one analysis phase directly against the LLM"""
+    content = f"{description.format(**inputs)}\nExpected output:\n{expected_output}"
+    if report_text is not None:
+        content += f"\n\nBlood test report:\n{report_text}"
+    return [
+        SystemMessage(content=f"You are a {agent.role}. {agent.backstory}\n\nYour goal: {agent.goal}"),
+        HumanMessage(content=content)
+    ]
+
+MAP_PAGE_PROMPT = (
+    "This is one page of a longer blood test report. List every blood marker on it with its "
+    "value, unit and reference range, and flag values outside the reference range. Include any "
+    "patient, laboratory or test date details. Reply with 'No blood test data' if the page has none."
+)
+
+async def condense_report(pages: list):
+    """
+    Map step: extract the findings of each page concurrently
+    
+    Args:
+        pages (list[str]): Extracted page texts, each headed by its page number
+        
+    Returns:
+        str: Per-page findings, headed by the same page markers
+    """
+    semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+    system_message = SystemMessage(content=f"You are a {medical_analyst.role}. {medical_analyst.backstory}")
+    
+    async def map_page(page):
+        async with semaphore:
+            response = await llm.ainvoke([system_message, HumanMessage(content=f"{MAP_PAGE_PROMPT}\n\n{page}")])
+            return response.content
+    
+    findings = await asyncio.gather(*(map_page(page) for page in pages))
+    
+    sections = []
+    for page, finding in zip(pages, findings):
+        page_header = page.partition("\n")[0]
+        sections.append(f"{page_header}\n{finding.strip()}")
+    return "\n\n".join(sections)
+
+async def run_direct_phase(phase: tuple, inputs: dict, report_text: str):
+    """
+    Run one analysis phase as a single LLM call over the given report text
+    
+    Args:
+        phase (tuple): Entry of STREAM_PHASES
+        inputs (dict): Values for the phase's description template
+        report_text (str): Report text, or condensed findings for large reports
+        
+    Returns:
+        str: Output of the phase
+    """
+    _, _, agent, description, expected_output = phase
+    response = await llm.ainvoke(phase_messages(agent, description, expected_output, inputs, report_text))
+    return response.content
+
+def sse_event(data: dict, event: Optional[str] = None):
+    """Format a Server-Sent Events message"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def stream_cached_analysis(query: str, analysis: str, processing_id: str):
+    """
+    Replay a cached analysis as SSE, in one delta
+    
+    Args:
+        query (str): Cleaned user query
+        analysis (str): Cached analysis text
+        processing_id (str): Unique ID of this request
+        
+    Yields:
+        str: Server-Sent Events messages
+    """
+    yield sse_event({"phase": "cached", "title": "Cached Analysis"}, event="phase")
+    yield sse_event({"delta": analysis})
+    yield sse_event({"status": "success", "query": query, "processing_id": processing_id}, event="done")
+
+async def stream_analysis(query: str, content_hash: str, report: ParsedReport, processing_id: str):
+    """
+    Stream the verification, analysis and guidance phases token by token as SSE
+    
+    Each phase sends the matching agent's prompt straight to the LLM, so
+    tokens can be forwarded as soon as they arrive. Verification and analysis
+    get the report text inlined, or its per-page findings for large reports;
+    guidance only works from their results.
+    
+    Args:
+        query (str): Cleaned user query
+        content_hash (str): Hash of the uploaded report contents
+        report (ParsedReport): Extracted blood test report
+        processing_id (str): Unique ID of this request
+        
+    Yields:
+        str: Server-Sent Events messages
+    """
+    try:
+        inputs = {
+            'query': query,
+            'content_hash': content_hash
+        }
+        report_text = None
+        for phase, title, agent, description, expected_output in STREAM_PHASES:
+            yield sse_event({"phase": phase, "title": title}, event="phase")
+            
+            # Large reports are condensed once, on the first phase that reads the report;
+            # guidance only gets the earlier results
+            if phase != "guidance" and report_text is None:
+                if len(report.pages) > MAP_REDUCE_PAGE_THRESHOLD:
+                    report_text = await condense_report(report.pages)
+                else:
+                    report_text = report.text
+            phase_report = None if phase == "guidance" else report_text
+            
+            messages = phase_messages(agent, description, expected_output, inputs, phase_report)
+            tokens = []
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield sse_event({"delta": chunk.content})
+            
+            # Later phases receive earlier results as {verification_result} / {analysis_result}
+            inputs[f"{phase}_result"] = ''.join(tokens).strip()
+        
+        _RESULT_CACHE[result_cache_key(content_hash, query)] = format_analysis({
+            key: inputs[f"{key}_result"] for key, _ in ANALYSIS_SECTIONS
+        })
+        
+        yield sse_event({"status": "success", "query": query, "processing_id": processing_id}, event="done")
+        
+    except Exception as e:
+        logger.error("Error streaming analysis: %s", e)
+        yield sse_event({"status": "error", "message": f"Analysis failed: {str(e)}"}, event="error")
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -91,6 +520,7 @@ async def health_check():
         "version": "1.0.0",
         "endpoints": {
             "analyze": "/analyze - POST - Upload and analyze blood test reports",
+            "analyze_stream": "/analyze/stream - POST - Upload and stream the analysis as Server-Sent Events",
             "health": "/health - GET - Service health status"
         }
     }
@@ -112,47 +542,21 @@ async def analyze_blood_report(
         JSON response with analysis results
     """
     
-    # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(
-            status_code=400, 
-            detail="Only PDF files are supported. Please upload a PDF blood test report."
-        )
-    
-    # Generate unique filename to avoid conflicts
+    # Unique ID for tracing this request
     file_id = str(uuid.uuid4())
-    file_path = f"data/blood_test_report_{file_id}.pdf"
     
     try:
-        # Ensure data directory exists
-        os.makedirs("data", exist_ok=True)
+        content, content_hash = await read_upload(file)
+        query = clean_query(query)
         
-        # Save uploaded file
-        logger.info(f"Saving uploaded file: {file.filename}")
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            if len(content) == 0:
-                raise HTTPException(status_code=400, detail="Uploaded file is empty")
-            f.write(content)
+        logger.info("Processing analysis for file: %s, Query: %.100s...", file.filename, query)
         
-        # Validate and clean query
-        if not query or query.strip() == "":
-            query = "Please analyze my blood test report and provide a comprehensive summary"
-        
-        query = query.strip()[:1000]  # Limit query length
-        
-        logger.info(f"Processing analysis for file: {file.filename}, Query: {query[:100]}...")
-        
-        # Run the analysis crew
-        analysis_result = run_analysis_crew(query=query, file_path=file_path)
-        
-        if analysis_result["status"] == "error":
-            raise HTTPException(status_code=500, detail=analysis_result["message"])
+        analysis = await get_or_run_analysis(query=query, content_hash=content_hash, content=content)
         
         return {
             "status": "success",
             "query": query,
-            "analysis": analysis_result["analysis"],
+            "analysis": analysis,
             "file_processed": file.filename,
             "file_size_bytes": len(content),
             "processing_id": file_id
@@ -161,21 +565,74 @@ async def analyze_blood_report(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error processing blood report: {str(e)}")
+        logger.error("Unexpected error processing blood report: %s", e)
         raise HTTPException(
             status_code=500, 
             detail=f"An unexpected error occurred while processing your blood report: {str(e)}"
         )
+
+@app.post("/analyze/stream")
+async def analyze_blood_report_stream(
+    file: UploadFile = File(..., description="Blood test report PDF file"),
+    query: str = Form(default="Please analyze my blood test report and provide a comprehensive summary", 
+                     description="Specific question or analysis request")
+):
+    """
+    Analyze uploaded blood test report and stream the results as Server-Sent Events
     
-    finally:
-        # Clean up uploaded file
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Cleaned up temporary file: {file_path}")
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to cleanup file {file_path}: {cleanup_error}")
+    Emits a `phase` event before each section, `data` messages with token
+    deltas, and a final `done` or `error` event.
+    
+    Args:
+        file: PDF file containing the blood test report
+        query: Specific question or analysis request from the user
+        
+    Returns:
+        text/event-stream response with the analysis
+    """
+    
+    # Unique ID for tracing this request
+    file_id = str(uuid.uuid4())
+    
+    try:
+        content, content_hash = await read_upload(file)
+        query = clean_query(query)
+        
+        # Replay cached results without parsing the PDF again
+        analysis = _RESULT_CACHE.get(result_cache_key(content_hash, query))
+        if analysis is not None:
+            logger.info("Streaming cached analysis for report: %s", content_hash)
+            stream = stream_cached_analysis(query, analysis, file_id)
+        else:
+            report = await extract_report(content_hash, content)
+            logger.info("Streaming analysis for file: %s, Query: %.100s...", file.filename, query)
+            stream = stream_analysis(query, content_hash, report, file_id)
+        
+        return StreamingResponse(stream, media_type="text/event-stream")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Unexpected error processing blood report: %s", e)
+        raise HTTPException(
+            status_code=500, 
+            detail=f"An unexpected error occurred while processing your blood report: {str(e)}"
+        )
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import runpy
+    import sys
+    # Exported so each worker can size its PDF pool to its share of the cores
+    os.environ.setdefault("WEB_CONCURRENCY", str(os.cpu_count() or 1))
+    # Serve through uvicorn's own __main__: spawned server workers and PDF
+    # parser processes then skip re-running this script as __mp_main__
+    sys.argv = [
+        "uvicorn", "main:app",
+        "--host", "0.0.0.0",
+        "--port", "8000",
+        "--workers", str(max(1, int(os.environ["WEB_CONCURRENCY"]))),
+        # Picks uvloop/httptools when installed (not available on Windows)
+        "--loop", "auto",
+        "--http", "auto"
+    ]
+    runpy.run_module("uvicorn", run_name="__main__", alter_sys=True)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List
+
+import pymupdf
+
+# Runs in the PDF worker processes, which preload only this module: keep its
+# imports to the standard library and pymupdf.
+
+@dataclass(frozen=True)
+class ParsedReport:
+    """
+    Extracted report pages, with the full and lowercase text derived lazily
+    
+    text and lower are computed at most once, on first use, and are left out
+    when the report is pickled back from the PDF worker pool.
+    """
+    pages: List[str]
+    
+    @cached_property
+    def text(self):
+        """Full report text"""
+        return '\n\n'.join(self.pages)
+    
+    @cached_property
+    def lower(self):
+        """Lowercase report text, shared by the keyword-based tools"""
+        return self.text.lower()
+    
+    def __getstate__(self):
+        return {"pages": self.pages}
+
+# Whitespace cleanup for extracted page text
+_WS_RE = re.compile(r'[ \t]+')
+_LINE_RE = re.compile(r'\s*\n\s*')
+
+def extract_pdf(path=None, data=None):
+    """
+    Extract and clean the text of a PDF from a file path or in-memory bytes
+    
+    Runs in the PDF worker pool, so it must stay a picklable module-level function.
+    
+    Args:
+        path (str, optional): Path to the PDF file
+        data (bytes, optional): Raw PDF contents, used instead of path when given
+        
+    Returns:
+        ParsedReport: Cleaned report, with no pages if nothing readable was found
+    """
+    if data is not None:
+        doc = pymupdf.open(stream=data, filetype="pdf")
+    else:
+        doc = pymupdf.open(path)
+    
+    with doc:
+        pages = [page.get_text("text") for page in doc]
+    
+    # Extract and clean content
+    parts = []
+    for i, page_text in enumerate(pages):
+        # Collapse tabs/spaces, then strip every line and drop blank ones
+        content = _WS_RE.sub(' ', page_text)
+        content = _LINE_RE.sub('\n', content).strip()
+        if content:
+            parts.append(f"--- Page {i+1} ---\n{content}")
+    
+    return ParsedReport(pages=parts)
@@ -0,0 +1,33 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+class KeyLock:
+    """A lock shared by the requests for one key, with a count of its holders and waiters"""
+    
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+@asynccontextmanager
+async def single_flight(locks, key):
+    """
+    Hold the lock for a key, so concurrent requests for it run one at a time
+    
+    The entry for a key is only dropped once nobody holds or awaits its lock,
+    so a request arriving while others wait never gets a second lock.
+    
+    Args:
+        locks (dict): Shared KeyLock entries, keyed like the cache they guard
+        key: Key of the work being guarded
+    """
+    entry = locks.get(key)
+    if entry is None:
+        entry = locks[key] = KeyLock()
+    entry.users += 1
+    try:
+        async with entry.lock:
+            yield
+    finally:
+        entry.users -= 1
+        if entry.users == 0:
+            del locks[key]
@@ -2,13 +2,18 @@ from crewai import Task
 from agents import medical_analyst, report_verifier, health_advisor
 from tools import search_tool, BloodTestReportTool
 
-# Task to verify and analyze blood test report
-analyze_blood_report = Task(
-    description="""
-    Analyze the uploaded blood test report to address the user's query: {query}
+# Task descriptions are built from explicit pieces: static instructions first,
+# then the per-request tail. Agents read the report with the tool through
+# REPORT_TOOL_INPUT; direct LLM calls inline the report and leave it out.
+REPORT_TOOL_INPUT = """
+    Read the blood test report with the report tool, using its content hash: {content_hash}
+    """
+
+ANALYSIS_INSTRUCTIONS = """
+    Analyze the uploaded blood test report to address the user's query.
     
     Steps to follow:
-    1. Read and parse the blood test report from the file path: {file_path}
+    1. Read and parse the blood test report
     2. Identify key blood markers and their values
     3. Compare values against normal reference ranges
     4. Identify any values that are outside normal ranges
@@ -16,7 +21,48 @@ analyze_blood_report = Task(
     6. Address the specific user query if provided
     
     Focus on providing accurate, factual information based on the actual report data.
-    """,
+    """
+
+ANALYSIS_REQUEST = """
+    User query: {query}
+    """
+
+VERIFICATION_INSTRUCTIONS = """
+    Verify that the uploaded document is a legitimate blood test report and extract basic information.
+    
+    Check for:
+    1. Presence of medical laboratory information
+    2. Patient information (anonymized for privacy)
+    3. Test dates and reference ranges
+    4. Laboratory values and units
+    5. Overall document structure and format
+    """
+
+GUIDANCE_INSTRUCTIONS = """
+    Based on the blood test analysis, provide general health and wellness recommendations.
+    
+    Provide guidance on:
+    1. General lifestyle factors that may influence blood test results
+    2. Nutritional considerations (general, not specific medical advice)
+    3. When to seek medical consultation
+    4. Follow-up testing recommendations
+    
+    Always emphasize that this is general information and not a substitute for professional medical advice.
+    """
+
+GUIDANCE_REQUEST = """
+    Document verification findings:
+    {verification_result}
+    
+    Blood test analysis findings:
+    {analysis_result}
+    
+    Consider the user's query: {query}
+    """
+
+# Task to verify and analyze blood test report
+analyze_blood_report = Task(
+    description=ANALYSIS_INSTRUCTIONS + REPORT_TOOL_INPUT + ANALYSIS_REQUEST,
     
     expected_output="""
     A comprehensive blood test analysis report containing:
@@ -38,18 +84,7 @@ analyze_blood_report = Task(
 
 # Task to verify document authenticity
 verify_document = Task(
-    description="""
-    Verify that the uploaded document is a legitimate blood test report and extract basic information.
-    
-    Check for:
-    1. Presence of medical laboratory information
-    2. Patient information (anonymized for privacy)
-    3. Test dates and reference ranges
-    4. Laboratory values and units
-    5. Overall document structure and format
-    
-    File path to analyze: {file_path}
-    """,
+    description=VERIFICATION_INSTRUCTIONS + REPORT_TOOL_INPUT,
     
     expected_output="""
     Document verification report including:
@@ -66,19 +101,7 @@ verify_document = Task(
 
 # Task to provide health recommendations
 provide_health_guidance = Task(
-    description="""
-    Based on the blood test analysis, provide general health and wellness recommendations.
-    
-    Consider the user's query: {query}
-    
-    Provide guidance on:
-    1. General lifestyle factors that may influence blood test results
-    2. Nutritional considerations (general, not specific medical advice)
-    3. When to seek medical consultation
-    4. Follow-up testing recommendations
-    
-    Always emphasize that this is general information and not a substitute for professional medical advice.
-    """,
+    description=GUIDANCE_INSTRUCTIONS + GUIDANCE_REQUEST,
     
     expected_output="""
     Health guidance report containing:
@@ -93,6 +116,5 @@ provide_health_guidance = Task(
     """,
     
     agent=health_advisor,
-    tools=[BloodTestReportTool.read_data_tool],
     async_execution=False,
 )
\ No newline at end of file
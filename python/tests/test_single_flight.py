@@ -0,0 +1,54 @@
+import asyncio
+import unittest
+
+from single_flight import single_flight
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_waiter_keeps_lock_after_holder_fails(self):
+        # A holder that fails must not drop the lock while B waits on it,
+        # or C would get a fresh lock and run alongside B
+        locks = {}
+        running = []
+        max_running = 0
+        
+        async def request(name, fail):
+            nonlocal max_running
+            async with single_flight(locks, "key"):
+                running.append(name)
+                max_running = max(max_running, len(running))
+                await asyncio.sleep(0.01)
+                running.remove(name)
+                if fail:
+                    raise RuntimeError(name)
+        
+        holder = asyncio.create_task(request("A", True))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(request("B", False))
+        with self.assertRaises(RuntimeError):
+            await holder
+        late = asyncio.create_task(request("C", False))
+        await asyncio.gather(waiter, late)
+        
+        self.assertEqual(max_running, 1)
+        self.assertEqual(locks, {})
+    
+    async def test_keys_run_independently(self):
+        locks = {}
+        running = set()
+        overlapped = False
+        
+        async def request(key):
+            nonlocal overlapped
+            async with single_flight(locks, key):
+                running.add(key)
+                await asyncio.sleep(0.01)
+                overlapped = overlapped or len(running) > 1
+                running.discard(key)
+        
+        await asyncio.gather(request("a"), request("b"))
+        
+        self.assertTrue(overlapped)
+        self.assertEqual(locks, {})
+
+if __name__ == "__main__":
+    unittest.main()
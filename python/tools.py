@@ -1,78 +1,271 @@
 import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from dotenv import load_dotenv
 load_dotenv()
 
 from crewai_tools import SerperDevTool
-from langchain_community.document_loaders import PyPDFLoader
+import ahocorasick
+from blake3 import blake3
+from cachetools import LRUCache, cached
+from cachetools.keys import hashkey
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from pdf_parser import ParsedReport, extract_pdf
+
 logger = logging.getLogger(__name__)
 
 # Creating search tool
 search_tool = SerperDevTool()
 
+# Digest size for content hashes; 128 bits is collision-safe for cache keys
+CONTENT_HASH_BYTES = 16
+
+def content_hasher():
+    """
+    Create an incremental hasher used to key cached report extractions
+    
+    Finish with hexdigest(length=CONTENT_HASH_BYTES) to get the content hash.
+    
+    Returns:
+        blake3 object: Hasher supporting update() and hexdigest()
+    """
+    return blake3()
+
+def _report_text(content):
+    """Return the text and lowercase text of a ParsedReport or plain string"""
+    if isinstance(content, ParsedReport):
+        return content.text, content.lower
+    return content, content.lower()
+
+# Extracted reports, keyed by content hash
+_EXTRACT_CACHE = LRUCache(maxsize=32)
+_EXTRACT_LOCK = threading.Lock()
+
+@cached(_EXTRACT_CACHE, key=lambda content_hash, path=None, data=None: hashkey(content_hash), lock=_EXTRACT_LOCK)
+def _extract(content_hash, path=None, data=None):
+    """
+    Extract and clean the text of a PDF, memoized by content hash
+    
+    Args:
+        content_hash (str): Hash of the PDF file contents
+        path (str, optional): Path to the PDF file
+        data (bytes, optional): Raw PDF contents
+        
+    Returns:
+        ParsedReport: Cleaned report
+    """
+    logger.info("Loading PDF from: %s", path)
+    return extract_pdf(path, data)
+
+class ActiveReport:
+    """A report pinned for in-flight requests, with a flag for failed tool reads"""
+    
+    def __init__(self, report):
+        self.report = report
+        self.users = 0
+        self.tool_failed = False
+
+# Reports of in-flight requests, keyed by content hash. Unlike the LRU above,
+# entries stay reachable until the last request using them finishes.
+_ACTIVE_REPORTS = {}
+_ACTIVE_LOCK = threading.Lock()
+
+@contextmanager
+def active_report(content_hash, report):
+    """
+    Keep a report reachable by content hash for the duration of a request
+    
+    Args:
+        content_hash (str): Hash of the PDF file contents
+        report (ParsedReport): Extracted report
+        
+    Yields:
+        ActiveReport: Entry whose tool_failed flag is set if a tool read of
+            this report returned an error
+    """
+    with _ACTIVE_LOCK:
+        entry = _ACTIVE_REPORTS.setdefault(content_hash, ActiveReport(report))
+        entry.users += 1
+    try:
+        yield entry
+    finally:
+        with _ACTIVE_LOCK:
+            entry.users -= 1
+            if entry.users == 0:
+                del _ACTIVE_REPORTS[content_hash]
+
+def get_cached_report(content_hash):
+    """
+    Look up an already extracted report by content hash
+    
+    Reports pinned by in-flight requests are checked before the extraction cache.
+    
+    Args:
+        content_hash (str): Hash of the PDF file contents
+        
+    Returns:
+        ParsedReport: Cached report, or None if the report has not been extracted
+    """
+    with _ACTIVE_LOCK:
+        entry = _ACTIVE_REPORTS.get(content_hash)
+    if entry is not None:
+        return entry.report
+    
+    with _EXTRACT_LOCK:
+        return _EXTRACT_CACHE.get(hashkey(content_hash))
+
+def _record_tool_failure(content_hash):
+    """Flag an in-flight report whose tool read returned an error"""
+    with _ACTIVE_LOCK:
+        entry = _ACTIVE_REPORTS.get(content_hash)
+        if entry is not None:
+            entry.tool_failed = True
+
+# Worker processes for CPU-bound PDF parsing, PDF_WORKERS=0 falls back to threads.
+# Each web worker owns a pool, so the default splits the cores between them.
+_PDF_WORKERS = int(os.getenv(
+    "PDF_WORKERS",
+    max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))
+))
+# Never fork: by the first submit this process already runs crew threads and
+# HTTP pools, and a forked child can deadlock on a lock held by one of them.
+_PDF_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if _PDF_MP_CONTEXT.get_start_method() == "forkserver":
+    # Workers fork from a server that has imported only the parser, not the app
+    _PDF_MP_CONTEXT.set_forkserver_preload(["pdf_parser"])
+# Started on first use, so importing this module never spawns processes
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+def _get_pdf_pool():
+    """Return the PDF worker pool, starting it on first use"""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            _PDF_POOL = ProcessPoolExecutor(max_workers=_PDF_WORKERS, mp_context=_PDF_MP_CONTEXT)
+        return _PDF_POOL
+
+def _discard_pdf_pool(pool):
+    """Drop a broken PDF worker pool so the next extraction starts a fresh one"""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is pool:
+            _PDF_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def read_data_async(content_hash, path=None, data=None):
+    """
+    Extract a PDF off the event loop and store the result in the extraction cache
+    
+    Args:
+        content_hash (str): Hash of the PDF file contents
+        path (str, optional): Path to the PDF file
+        data (bytes, optional): Raw PDF contents, used instead of path when given
+        
+    Returns:
+        ParsedReport: Cleaned report, with no pages if nothing readable was found
+        
+    Raises:
+        BrokenProcessPool: A PDF worker process died during extraction
+    """
+    report = get_cached_report(content_hash)
+    if report is None:
+        logger.info("Loading PDF %s from %s", content_hash, "memory" if data is not None else path)
+        if _PDF_WORKERS > 0:
+            pool = _get_pdf_pool()
+            try:
+                report = await asyncio.get_running_loop().run_in_executor(pool, extract_pdf, path, data)
+            except BrokenProcessPool:
+                # A worker died (crash or OOM kill); later uploads get a new pool
+                logger.error("PDF worker pool broke while reading %s, restarting it", content_hash)
+                _discard_pdf_pool(pool)
+                raise
+        else:
+            report = await asyncio.to_thread(extract_pdf, path, data)
+        
+        with _EXTRACT_LOCK:
+            _EXTRACT_CACHE[hashkey(content_hash)] = report
+    
+    return report
+
 class BloodTestReportTool:
     @staticmethod
-    def read_data_tool(path='data/sample.pdf'):
+    def read_data_tool(path=None, content_hash=None):
         """
         Tool to read and extract data from a PDF blood test report
         
+        Uploaded reports are never written to disk; they are looked up by
+        content hash among in-flight reports and in the extraction cache. A path is only needed for
+        reports that live on disk.
+        
         Args:
-            path (str): Path to the PDF file containing the blood test report
+            path (str, optional): Path to the PDF file containing the blood test report
+            content_hash (str, optional): Hash of the report contents, returns the
+                cached extraction when available and skips re-hashing the file
             
         Returns:
             str: Extracted text content from the blood test report
         """
+        result = BloodTestReportTool._read_report_text(path, content_hash)
+        if content_hash is not None and result.startswith("Error"):
+            _record_tool_failure(content_hash)
+        return result
+    
+    @staticmethod
+    def _read_report_text(path, content_hash):
+        """Read the report text for read_data_tool, returning an error message on failure"""
         try:
-            # Check if file exists
-            if not os.path.exists(path):
-                logger.error(f"File not found: {path}")
-                return f"Error: File not found at path: {path}"
-            
-            # Check file size (basic validation)
-            file_size = os.path.getsize(path)
-            if file_size == 0:
-                logger.error(f"File is empty: {path}")
-                return f"Error: File is empty: {path}"
-            
-            if file_size > 10 * 1024 * 1024:  # 10MB limit
-                logger.error(f"File too large: {path}")
-                return f"Error: File size exceeds 10MB limit: {path}"
+            report = None
+            if content_hash is not None:
+                report = get_cached_report(content_hash)
             
-            # Load and process PDF
-            logger.info(f"Loading PDF from: {path}")
-            loader = PyPDFLoader(file_path=path)
-            docs = loader.load()
+            if report is None:
+                if path is None:
+                    logger.error("No report available for content hash: %s", content_hash)
+                    return f"Error: No blood test report found for content hash: {content_hash}"
+                
+                # Check the file exists and its size (basic validation) with one stat call
+                try:
+                    file_size = os.stat(path).st_size
+                except FileNotFoundError:
+                    logger.error("File not found: %s", path)
+                    return f"Error: File not found at path: {path}"
+                
+                if file_size == 0:
+                    logger.error("File is empty: %s", path)
+                    return f"Error: File is empty: {path}"
+                
+                if file_size > 10 * 1024 * 1024:  # 10MB limit
+                    logger.error("File too large: %s", path)
+                    return f"Error: File size exceeds 10MB limit: {path}"
+                
+                if content_hash is None:
+                    hasher = content_hasher()
+                    with open(path, "rb") as f:
+                        while chunk := f.read(1 << 20):
+                            hasher.update(chunk)
+                    content_hash = hasher.hexdigest(length=CONTENT_HASH_BYTES)
+                
+                # Load and process PDF (cached per content hash)
+                report = _extract(content_hash, path)
             
-            if not docs:
-                logger.error("No documents loaded from PDF")
-                return "Error: Could not extract any content from the PDF file"
-            
-            # Extract and clean content
-            full_report = ""
-            for i, doc in enumerate(docs):
-                content = doc.page_content.strip()
-                if content:
-                    # Clean up formatting
-                    content = content.replace('\n\n\n', '\n\n')
-                    content = content.replace('\t', ' ')
-                    # Remove excessive whitespace
-                    lines = [line.strip() for line in content.split('\n') if line.strip()]
-                    content = '\n'.join(lines)
-                    
-                    full_report += f"--- Page {i+1} ---\n{content}\n\n"
-            
-            if not full_report.strip():
+            full_report = report.text
+            if not full_report:
                 logger.error("No readable content found in PDF")
                 return "Error: No readable text content found in the PDF file"
             
-            logger.info(f"Successfully extracted {len(full_report)} characters from PDF")
-            return full_report.strip()
+            logger.info("Successfully extracted %s characters from PDF", len(full_report))
+            return full_report
             
         except Exception as e:
-            logger.error(f"Error processing PDF {path}: {str(e)}")
+            logger.error("Error processing PDF %s: %s", path, e)
             return f"Error reading PDF file: {str(e)}"
 
 class HealthAnalysisTool:
@@ -82,27 +275,47 @@ class HealthAnalysisTool:
         Analyze blood markers from report content
         
         Args:
-            report_content (str): Raw text content from blood test report
+            report_content (str or ParsedReport): Text content from blood test report
             
         Returns:
             dict: Structured analysis of blood markers
         """
         try:
+            report_content, content_lower = _report_text(report_content)
+            
             # This is a placeholder for more sophisticated analysis
             # In a real implementation, you would parse specific blood markers
             analysis = {
                 "status": "analyzed",
                 "content_length": len(report_content),
-                "contains_medical_data": any(term in report_content.lower() for term in 
+                "contains_medical_data": any(term in content_lower for term in 
                     ['hemoglobin', 'glucose', 'cholesterol', 'white blood cell', 'red blood cell', 
                      'platelet', 'hematocrit', 'mcv', 'mch', 'mchc']),
                 "report_preview": report_content[:500] + "..." if len(report_content) > 500 else report_content
             }
             return analysis
         except Exception as e:
-            logger.error(f"Error analyzing blood markers: {str(e)}")
+            logger.error("Error analyzing blood markers: %s", e)
             return {"status": "error", "message": str(e)}
 
+MEDICAL_KEYWORDS = [
+    'laboratory', 'lab', 'blood', 'test', 'result', 'reference', 'range',
+    'normal', 'abnormal', 'high', 'low', 'patient', 'specimen', 'collected'
+]
+
+BLOOD_TEST_MARKERS = [
+    'hemoglobin', 'hgb', 'hematocrit', 'hct', 'glucose', 'cholesterol',
+    'triglycerides', 'hdl', 'ldl', 'wbc', 'rbc', 'platelet', 'mcv', 'mch'
+]
+
+# Aho-Corasick automaton matching all validation keywords at once
+_VALIDATION_AUTOMATON = ahocorasick.Automaton()
+for _keyword in MEDICAL_KEYWORDS:
+    _VALIDATION_AUTOMATON.add_word(_keyword, (_keyword, True))
+for _keyword in BLOOD_TEST_MARKERS:
+    _VALIDATION_AUTOMATON.add_word(_keyword, (_keyword, False))
+_VALIDATION_AUTOMATON.make_automaton()
+
 class ReportValidationTool:
     @staticmethod
     def validate_medical_report(content):
@@ -110,26 +323,26 @@ class ReportValidationTool:
         Validate if the content appears to be a legitimate medical report
         
         Args:
-            content (str): Text content to validate
+            content (str or ParsedReport): Text content to validate
             
         Returns:
             dict: Validation results
         """
         try:
-            medical_keywords = [
-                'laboratory', 'lab', 'blood', 'test', 'result', 'reference', 'range',
-                'normal', 'abnormal', 'high', 'low', 'patient', 'specimen', 'collected'
-            ]
-            
-            blood_test_markers = [
-                'hemoglobin', 'hgb', 'hematocrit', 'hct', 'glucose', 'cholesterol',
-                'triglycerides', 'hdl', 'ldl', 'wbc', 'rbc', 'platelet', 'mcv', 'mch'
-            ]
-            
-            content_lower = content.lower()
+            _, content_lower = _report_text(content)
             
-            medical_score = sum(1 for keyword in medical_keywords if keyword in content_lower)
-            blood_test_score = sum(1 for marker in blood_test_markers if marker in content_lower)
+            # Count each distinct keyword once, in a single pass over the content
+            medical_score = 0
+            blood_test_score = 0
+            seen = set()
+            for _, (keyword, is_medical) in _VALIDATION_AUTOMATON.iter(content_lower):
+                if keyword in seen:
+                    continue
+                seen.add(keyword)
+                if is_medical:
+                    medical_score += 1
+                else:
+                    blood_test_score += 1
             
             validation = {
                 "is_medical_document": medical_score >= 3,
@@ -142,5 +355,5 @@ class ReportValidationTool:
             return validation
             
         except Exception as e:
-            logger.error(f"Error validating report: {str(e)}")
+            logger.error("Error validating report: %s", e)
             return {"is_medical_document": False, "is_blood_test": False, "error": str(e)}
\ No newline at end of file